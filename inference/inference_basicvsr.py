@@ -1,24 +1,88 @@
 import argparse
 import cv2
 import glob
+import numpy as np
 import os
 import shutil
 import oneflow as flow
+from concurrent.futures import ThreadPoolExecutor
 
-from onesr.archs.basicvsr_arch import BasicVSR
-from onesr.data.data_util import read_img_seq
-from onesr.utils.img_util import tensor2img
+from onesr.archs.basicvsr_arch import BasicVSR, BasicVSRGraph
+from onesr.data.data_util import generate_chunk_indices, read_img_seq
+from onesr.utils.img_util import imwrite
 
+# favour encoding speed, PNG stays lossless at any compression level
+_imwrite_params = {
+    "png": [cv2.IMWRITE_PNG_COMPRESSION, 1],
+    "jpg": [cv2.IMWRITE_JPEG_QUALITY, 95],
+    "webp": [cv2.IMWRITE_WEBP_QUALITY, 95],
+}
 
-def inference(imgs, imgnames, model, save_path):
-    with flow.no_grad():
-        outputs = model(imgs)
-    # save imgs
-    outputs = outputs.squeeze()
-    outputs = list(outputs)
-    for output, imgname in zip(outputs, imgnames):
-        output = tensor2img(output)
-        cv2.imwrite(os.path.join(save_path, f"{imgname}_BasicVSR.png"), output)
+
+def positive_int(value):
+    value = int(value)
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"expected a positive integer, got {value}")
+    return value
+
+
+def read_chunks(imgs_list, starts, interval, imgs):
+    """Read chunks of `interval` frames into the rows of the batch `imgs`.
+
+    Rows after the last chunk are filled with the last chunk again so that
+    the input shape of the graph does not change.
+    """
+    imgnames = []
+    for i, start in enumerate(starts):
+        chunk, chunk_imgnames = read_img_seq(
+            imgs_list[start : start + interval], return_imgname=True
+        )
+        imgs[i] = chunk
+        imgnames.append(chunk_imgnames)
+    for i in range(len(starts), imgs.size(0)):
+        imgs[i] = chunk
+    return imgs, imgnames
+
+
+def save_img(img, file_path, params):
+    """Convert an output frame to a uint8 BGR image like `tensor2img` and
+    write it. It only uses numpy and opencv, so it can run on the writer pool.
+
+    Args:
+        img (ndarray): RGB frame of shape (c, h, w) in [0, 1].
+        file_path (str): Image file path.
+        params (list): Same as opencv's :func:`imwrite` interface.
+    """
+    img = np.clip(img.astype(np.float32), 0, 1)
+    img = img[::-1].transpose(1, 2, 0)  # RGB to BGR, (h, w, c)
+    # Unlike MATLAB, numpy.unit8() WILL NOT round by default.
+    img = np.ascontiguousarray((img * 255.0).round().astype(np.uint8))
+    imwrite(img, file_path, params, auto_mkdir=False)
+
+
+def inference(imgs, imgnames, model, save_path, writer, skips, ext="png", pending=()):
+    outputs = model(imgs)
+    # a single copy to host for the whole batch
+    outputs = outputs.cpu().numpy()
+    # wait for the writes of the previous batch, this bounds the queued frames
+    # and raises the errors of failed writes
+    for future in pending:
+        future.result()
+    # save imgs, padded chunks have no imgnames and are dropped by zip
+    futures = []
+    for chunk, chunk_imgnames, skip in zip(outputs, imgnames, skips):
+        # the first `skip` frames have been saved by the previous chunk
+        for output, imgname in zip(chunk[skip:], chunk_imgnames[skip:]):
+            # convert and encode on the writer pool so the next chunk is not
+            # blocked
+            future = writer.submit(
+                save_img,
+                output,
+                os.path.join(save_path, f"{imgname}_BasicVSR.{ext}"),
+                _imwrite_params[ext],
+            )
+            futures.append(future)
+    return futures
 
 
 def main():
@@ -37,8 +101,31 @@ def main():
     parser.add_argument(
         "--save_path", type=str, default="results/BasicVSR", help="save image path"
     )
-    parser.add_argument("--interval", type=int, default=15, help="interval size")
+    parser.add_argument(
+        "--interval", type=positive_int, default=15, help="interval size"
+    )
+    parser.add_argument(
+        "--batch_size",
+        type=positive_int,
+        default=1,
+        help="number of intervals per forward, the last batch is padded with "
+        "repeated intervals, which costs up to batch_size - 1 wasted intervals",
+    )
+    parser.add_argument(
+        "--fp16", action="store_true", help="use FP16 mixed precision on GPU"
+    )
+    parser.add_argument(
+        "--output_format",
+        type=str,
+        default="png",
+        choices=list(_imwrite_params),
+        help="output image format",
+    )
     args = parser.parse_args()
+    if not cv2.haveImageWriter(f"frame.{args.output_format}"):
+        raise ValueError(
+            f"OpenCV is built without an encoder for {args.output_format} images."
+        )
 
     device = flow.device("cuda" if flow.cuda.is_available() else "cpu")
 
@@ -47,6 +134,10 @@ def main():
     model.load_state_dict(flow.load(args.model_path)["params"], strict=True)
     model.eval()
     model = model.to(device)
+    use_cuda = device.type == "cuda"
+    model = BasicVSRGraph(
+        model, use_cuda_graph=use_cuda, use_amp=use_cuda and args.fp16
+    )
 
     os.makedirs(args.save_path, exist_ok=True)
 
@@ -65,18 +156,57 @@ def main():
     # load data and inference
     imgs_list = sorted(glob.glob(os.path.join(input_path, "*")))
     num_imgs = len(imgs_list)
-    if len(imgs_list) <= args.interval:  # too many images may cause CUDA out of memory
-        imgs, imgnames = read_img_seq(imgs_list, return_imgname=True)
-        imgs = imgs.unsqueeze(0).to(device)
-        inference(imgs, imgnames, model, args.save_path)
-    else:
-        for idx in range(0, num_imgs, args.interval):
-            interval = min(args.interval, num_imgs - idx)
-            imgs, imgnames = read_img_seq(
-                imgs_list[idx : idx + interval], return_imgname=True
+    if num_imgs == 0:
+        raise FileNotFoundError(f"No input images found in {input_path}.")
+    # too many images in a chunk may cause CUDA out of memory, every chunk has
+    # `interval` frames so that the graph is compiled only once
+    interval, starts, skips = generate_chunk_indices(num_imgs, args.interval)
+    # several chunks are batched together to fill up the device
+    batch_size = min(args.batch_size, len(starts))
+    batches = [
+        (starts[i : i + batch_size], skips[i : i + batch_size])
+        for i in range(0, len(starts), batch_size)
+    ]
+    # two batch buffers, allocated in page-locked memory on GPU for a faster
+    # host to device copy, one is filled while the other one is inferred
+    h, w = cv2.imread(imgs_list[0]).shape[:2]
+    buffers = [
+        flow.empty((batch_size, interval, 3, h, w), pin_memory=use_cuda)
+        for _ in range(2)
+    ]
+    with ThreadPoolExecutor(max_workers=1) as reader, ThreadPoolExecutor(
+        max_workers=os.cpu_count()
+    ) as writer:
+        # read the next batch from disk while the current one is inferred
+        next_batch = reader.submit(
+            read_chunks, imgs_list, batches[0][0], interval, buffers[0]
+        )
+        futures = []
+        for i, (_, batch_skips) in enumerate(batches):
+            imgs, imgnames = next_batch.result()
+            if i + 1 < len(batches):
+                # the buffer of batch i - 1 is free, inference() has waited for
+                # its outputs and thus for its copy to the device
+                next_batch = reader.submit(
+                    read_chunks,
+                    imgs_list,
+                    batches[i + 1][0],
+                    interval,
+                    buffers[(i + 1) % 2],
+                )
+            imgs = imgs.to(device)
+            futures = inference(
+                imgs,
+                imgnames,
+                model,
+                args.save_path,
+                writer,
+                batch_skips,
+                ext=args.output_format,
+                pending=futures,
             )
-            imgs = imgs.unsqueeze(0).to(device)
-            inference(imgs, imgnames, model, args.save_path)
+        for future in futures:
+            future.result()
 
     # delete ffmpeg output images
     if use_ffmpeg:
@@ -85,7 +85,10 @@ class ResidualBlockNoBN(nn.Module):
     def forward(self, x):
         identity = x
         out = self.conv2(self.relu(self.conv1(x)))
-        return identity + out * self.res_scale
+        if self.res_scale != 1:
+            out = out * self.res_scale
+        # without the scale, nn.Graph can fuse the add into conv2
+        return identity + out
 
 
 class Upsample(nn.Sequential):
@@ -121,6 +121,41 @@ class ConvResidualBlocks(nn.Module):
         return self.main(fea)
 
 
+class BasicVSRGraph(nn.Graph):
+    """Static graph of BasicVSR for inference.
+
+    The graph is compiled for the shape of its first input, so all the chunks
+    fed into it must have the same number of frames. Compiling it lets OneFlow
+    fuse the residual additions of the propagation trunks and the base image
+    addition into the preceding convolutions, and plan the memory of the whole
+    forward pass once.
+
+    Args:
+        model (nn.Module): BasicVSR model in eval mode.
+        use_cuda_graph (bool): Whether to capture the kernels of the forward
+            pass as a CUDA Graph and replay it for every chunk. Default: False.
+        use_amp (bool): Whether to run the forward pass in FP16 with automatic
+            mixed precision. Default: False.
+    """
+
+    def __init__(self, model, use_cuda_graph=False, use_amp=False):
+        super().__init__()
+        self.model = model
+        # fuse adds that directly follow a convolution, i.e. the adds of the
+        # residual blocks (res_scale is 1) and `out += base` after conv_last
+        self.config.allow_fuse_add_to_output(True)
+        # the input shape is fixed, so an exhaustive search of the cuDNN
+        # convolution algorithms is only paid once at compile time
+        self.config.enable_cudnn_conv_heuristic_search_algo(False)
+        if use_cuda_graph:
+            self.config.enable_cuda_graph(True)
+        if use_amp:
+            self.config.enable_amp(True)
+
+    def build(self, imgs):
+        return self.model(imgs)
+
+
 @ARCH_REGISTRY.register()
 class IconVSR(nn.Module):
     """IconVSR, proposed also in the BasicVSR paper.
@@ -30,13 +30,13 @@ class EnlargedSampler(Sampler):
         # deterministically shuffle based on epoch
         g = flow.Generator()
         g.manual_seed(self.epoch)
-        indices = flow.randperm(self.total_size, generator=g).tolist()
+        indices = flow.randperm(self.total_size, generator=g)
 
         dataset_size = len(self.dataset)
-        indices = [v % dataset_size for v in indices]
+        indices = indices % dataset_size
 
         # subsample
-        indices = indices[self.rank : self.total_size : self.num_replicas]
+        indices = indices[self.rank : self.total_size : self.num_replicas].tolist()
         assert len(indices) == self.num_samples
 
         return iter(indices)
@@ -97,6 +97,36 @@ def generate_frame_indices(crt_idx, max_frame_num, num_frames, padding="reflecti
     return indices
 
 
+def generate_chunk_indices(num_frames, interval):
+    """Split a sequence of `num_frames` frames into chunks of `interval`
+    frames for inference.
+
+    All the chunks have the same length. The last chunk is shifted back to
+    overlap with the previous one instead of being padded, so every frame is
+    covered exactly once after skipping the overlapped frames.
+    Example: num_frames = 20, interval = 15
+        interval: 15, starts: [0, 5], skips: [0, 10]
+
+    Args:
+        num_frames (int): Number of frames in the sequence.
+        interval (int): Number of frames in each chunk. It is clipped to
+            `num_frames` for short sequences.
+
+    Returns:
+        int: Number of frames in each chunk after clipping.
+        list[int]: Start index of each chunk.
+        list[int]: Number of leading frames of each chunk that are already
+            covered by the previous chunk.
+    """
+    assert num_frames > 0, "There are no frames to split."
+    assert interval > 0, f"interval should be positive, but got {interval}."
+    interval = min(interval, num_frames)
+    idxs = list(range(0, num_frames, interval))
+    starts = [min(idx, num_frames - interval) for idx in idxs]
+    skips = [idx - start for idx, start in zip(idxs, starts)]
+    return interval, starts, skips
+
+
 def paired_paths_from_lmdb(folders, keys):
     """Generate paired paths from lmdb files.
 
@@ -1,25 +1,16 @@
 import functools
+import warnings
 import oneflow as flow
 from oneflow.nn import functional as F
 
 _reduction_modes = ["none", "mean", "sum"]
 
-
-def get_enum(reduction):
-    if reduction == "none":
-        ret = 0
-    elif reduction == "mean":
-        ret = 1
-    elif reduction == "elementwise_mean":
-        warnings.warn(
-            "reduction='elementwise_mean' is deprecated, please use reduction='mean' instead."
-        )
-        ret = 1
-    elif reduction == "sum":
-        ret = 2
-    else:
-        raise ValueError("{} is not a valid value for reduction".format(reduction))
-    return ret
+_reduction_fns = {
+    "none": lambda loss: loss,
+    "mean": flow.mean,
+    "elementwise_mean": flow.mean,
+    "sum": flow.sum,
+}
 
 
 def reduce_loss(loss, reduction):
@@ -32,14 +23,17 @@ def reduce_loss(loss, reduction):
     Returns:
         Tensor: Reduced loss tensor.
     """
-    reduction_enum = get_enum(reduction)
-    # none: 0, mean / elementwise_mean: 1, sum: 2
-    if reduction_enum == 0:
-        return loss
-    elif reduction_enum == 1:
-        return loss.mean()
-    else:
-        return loss.sum()
+    try:
+        reduction_fn = _reduction_fns[reduction]
+    except KeyError:
+        raise ValueError(
+            "{} is not a valid value for reduction".format(reduction)
+        ) from None
+    if reduction == "elementwise_mean":
+        warnings.warn(
+            "reduction='elementwise_mean' is deprecated, please use reduction='mean' instead."
+        )
+    return reduction_fn(loss)
 
 
 def weight_reduce_loss(loss, weight=None, reduction="mean"):
@@ -54,22 +48,30 @@ def weight_reduce_loss(loss, weight=None, reduction="mean"):
     Returns:
         Tensor: Loss values.
     """
+    # if weight is not specified, just reduce the loss
+    if weight is None:
+        return reduce_loss(loss, reduction)
+
     # if weight is specified, apply element-wise weight
-    if weight is not None:
-        assert weight.dim() == loss.dim()
-        assert weight.size(1) == 1 or weight.size(1) == loss.size(1)
-        loss = loss * weight
-
-    # if weight is not specified or reduction is sum, just reduce the loss
-    if weight is None or reduction == "sum":
-        loss = reduce_loss(loss, reduction)
+    assert weight.dim() == loss.dim()
+    assert weight.size(1) == 1 or weight.size(1) == loss.size(1)
+    if reduction not in ("sum", "mean"):
+        return loss * weight
+
+    num_channels = loss.size(1)
+    if weight.shape == loss.shape:
+        # multiply and accumulate in a single pass
+        loss = flow.dot(loss.flatten(), weight.flatten())
+    else:
+        loss = (loss * weight).sum()
+
     # if reduction is mean, then compute mean over weight region
-    elif reduction == "mean":
+    if reduction == "mean":
         if weight.size(1) > 1:
             weight = weight.sum()
         else:
-            weight = weight.sum() * loss.size(1)
-        loss = loss.sum() / weight
+            weight = weight.sum() * num_channels
+        loss = loss / weight
 
     return loss
 
@@ -131,11 +133,13 @@ def get_local_weights(residual, ksize):
     pad = (ksize - 1) // 2
     residual_pad = F.pad(residual, pad=[pad, pad, pad, pad], mode="reflect")
 
-    unfolded_residual = residual_pad.unfold(2, ksize, 1).unfold(3, ksize, 1)
-    pixel_level_weight = (
-        flow.var(unfolded_residual, dim=(-1, -2), unbiased=True, keepdim=True)
-        .squeeze(-1)
-        .squeeze(-1)
+    # unbiased local variance computed as E[x^2] - E[x]^2 over each window,
+    # which avoids materializing the k*k unfolded windows
+    mean = F.avg_pool2d(residual_pad, ksize, stride=1)
+    mean_sq = F.avg_pool2d(residual_pad * residual_pad, ksize, stride=1)
+    num_elements = ksize * ksize
+    pixel_level_weight = (mean_sq - mean * mean).clamp(min=0) * (
+        num_elements / (num_elements - 1)
     )
 
     return pixel_level_weight
@@ -159,12 +163,12 @@ def get_refined_artifact_map(img_gt, img_output, img_ema, ksize):
     residual_ema = flow.sum(flow.abs(img_gt - img_ema), 1, keepdim=True)
     residual_sr = flow.sum(flow.abs(img_gt - img_output), 1, keepdim=True)
 
-    patch_level_weight = flow.var(
-        residual_sr.clone(), dim=(-1, -2, -3), keepdim=True
-    ) ** (1 / 5)
-    pixel_level_weight = get_local_weights(residual_sr.clone(), ksize)
+    patch_level_weight = flow.var(residual_sr, dim=(-1, -2, -3), keepdim=True) ** (
+        1 / 5
+    )
+    pixel_level_weight = get_local_weights(residual_sr, ksize)
     overall_weight = patch_level_weight * pixel_level_weight
 
-    overall_weight[residual_sr < residual_ema] = 0
+    overall_weight = flow.where(residual_sr < residual_ema, 0.0, overall_weight)
 
     return overall_weight
@@ -1,6 +1,12 @@
+import math
 import oneflow as flow
 
-from onesr.archs.basicvsr_arch import BasicVSR, ConvResidualBlocks, IconVSR
+from onesr.archs.basicvsr_arch import (
+    BasicVSR,
+    BasicVSRGraph,
+    ConvResidualBlocks,
+    IconVSR,
+)
 
 
 def test_basicvsr():
@@ -13,6 +19,65 @@ def test_basicvsr():
     assert output.shape == (1, 2, 3, 256, 256)
 
 
+def test_basicvsr_graph():
+    """Test graph: BasicVSRGraph matches the eager BasicVSR."""
+
+    net = BasicVSR(num_feat=8, num_block=1, spynet_path=None)
+    net.eval()
+    img = flow.rand((1, 3, 3, 32, 32), dtype=flow.float32)
+    with flow.no_grad():
+        output = net(img)
+    output_graph = BasicVSRGraph(net)(img)
+    assert output_graph.shape == (1, 3, 3, 128, 128)
+    assert flow.allclose(output_graph, output, atol=1e-5)
+
+
+def test_basicvsr_graph_cuda():
+    """Test graph: BasicVSRGraph with fused residual adds matches on GPU."""
+
+    net = BasicVSR(num_feat=8, num_block=2, spynet_path=None).cuda()
+    net.eval()
+    img = flow.rand((1, 3, 3, 32, 32), dtype=flow.float32).cuda()
+    with flow.no_grad():
+        output = net(img)
+    output_graph = BasicVSRGraph(net)(img)
+    assert flow.allclose(output_graph, output, atol=1e-4)
+
+
+def test_basicvsr_cuda_graph():
+    """Test graph: BasicVSRGraph replays its CUDA Graph with new inputs."""
+
+    net = BasicVSR(num_feat=8, num_block=1, spynet_path=None).cuda()
+    net.eval()
+    graph = BasicVSRGraph(net, use_cuda_graph=True)
+    # inputs of the same shape reuse the captured graph
+    for _ in range(2):
+        img = flow.rand((1, 3, 3, 32, 32), dtype=flow.float32).cuda()
+        with flow.no_grad():
+            output = net(img)
+        output_graph = graph(img)
+        assert flow.allclose(output_graph, output, atol=1e-4)
+
+
+def test_basicvsr_graph_amp():
+    """Test graph: BasicVSRGraph with FP16 mixed precision is close to FP32."""
+
+    net = BasicVSR(num_feat=8, num_block=1, spynet_path=None).cuda()
+    net.eval()
+    img = flow.rand((1, 3, 3, 32, 32), dtype=flow.float32).cuda()
+    with flow.no_grad():
+        output = net(img)
+    output_amp = BasicVSRGraph(net, use_amp=True)(img)
+    # outputs are converted to uint8 images from a float array on the host
+    assert output_amp.dtype in (flow.float16, flow.float32)
+    assert output_amp.shape == output.shape
+
+    output_amp = output_amp.float()
+    assert flow.allclose(output_amp, output, atol=5e-2)
+    mse = ((output_amp.clamp(0, 1) - output.clamp(0, 1)) ** 2).mean().item()
+    assert mse == 0 or 10 * math.log10(1 / mse) > 40
+
+
 def test_convresidualblocks():
     """Test block: ConvResidualBlocks."""
 
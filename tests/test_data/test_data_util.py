@@ -0,0 +1,37 @@
+import pytest
+
+from onesr.data.data_util import generate_chunk_indices
+
+
+@pytest.mark.parametrize(
+    "num_frames, interval", [(20, 15), (30, 15), (15, 15), (7, 15), (5, 1)]
+)
+def test_generate_chunk_indices(num_frames, interval):
+    """Test data util: generate_chunk_indices"""
+
+    chunk_len, starts, skips = generate_chunk_indices(num_frames, interval)
+    assert chunk_len == min(interval, num_frames)
+    assert len(starts) == len(skips)
+    interval = chunk_len
+
+    covered = []
+    for start, skip in zip(starts, skips):
+        # every chunk has the same length and stays inside the sequence
+        assert 0 <= start and start + interval <= num_frames
+        assert 0 <= skip < interval
+        covered.extend(range(start + skip, start + interval))
+    # every frame is covered exactly once, in order
+    assert covered == list(range(num_frames))
+
+
+def test_generate_chunk_indices_edge_cases():
+    """Test data util: generate_chunk_indices with short and empty inputs"""
+
+    assert generate_chunk_indices(20, 15) == (15, [0, 5], [0, 10])
+    assert generate_chunk_indices(15, 15) == (15, [0], [0])
+    assert generate_chunk_indices(7, 15) == (7, [0], [0])
+
+    with pytest.raises(AssertionError):
+        generate_chunk_indices(5, 0)
+    with pytest.raises(AssertionError):
+        generate_chunk_indices(0, 15)
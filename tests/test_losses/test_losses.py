@@ -1,7 +1,14 @@
 import pytest
 import oneflow as flow
 
+from oneflow.nn import functional as F
+
 from onesr.losses.basic_loss import CharbonnierLoss, L1Loss, MSELoss, WeightedTVLoss
+from onesr.losses.loss_util import (
+    get_local_weights,
+    get_refined_artifact_map,
+    weight_reduce_loss,
+)
 
 
 @pytest.mark.parametrize("loss_class", [L1Loss, MSELoss, CharbonnierLoss])
@@ -70,3 +77,75 @@ def test_weightedtvloss():
         WeightedTVLoss(loss_weight=1.0, reduction="unknown")
     with pytest.raises(ValueError):
         WeightedTVLoss(loss_weight=1.0, reduction="none")
+
+
+@pytest.mark.parametrize("ksize", [3, 7])
+def test_get_local_weights(ksize):
+    """Test loss util: get_local_weights"""
+
+    residual = flow.rand((2, 1, 16, 16), dtype=flow.float32)
+    residual_ref = residual.clone()
+    out = get_local_weights(residual, ksize)
+    assert out.shape == (2, 1, 16, 16)
+    # the residual is not modified in place, so callers need not clone it
+    assert flow.equal(residual, residual_ref)
+
+    # compare with the variance of explicitly unfolded windows
+    pad = (ksize - 1) // 2
+    residual_pad = F.pad(residual, pad=[pad, pad, pad, pad], mode="reflect")
+    unfolded_residual = residual_pad.unfold(2, ksize, 1).unfold(3, ksize, 1)
+    expected = flow.var(unfolded_residual, dim=(-1, -2), unbiased=True)
+    assert flow.allclose(out, expected, atol=1e-5)
+
+
+@pytest.mark.parametrize("weight_channels", [1, 3])
+def test_weight_reduce_loss(weight_channels):
+    """Test loss util: weight_reduce_loss"""
+
+    loss = flow.rand((2, 3, 4, 4), dtype=flow.float32)
+    weight = flow.rand((2, weight_channels, 4, 4), dtype=flow.float32)
+    weighted = loss * weight
+
+    out = weight_reduce_loss(loss, weight, reduction="none")
+    assert flow.allclose(out, weighted)
+
+    out = weight_reduce_loss(loss, weight, reduction="sum")
+    assert flow.allclose(out, weighted.sum())
+
+    out = weight_reduce_loss(loss, weight, reduction="mean")
+    weight_sum = weight.sum() * (3 // weight_channels)
+    assert flow.allclose(out, weighted.sum() / weight_sum)
+
+
+def _refined_artifact_map_ref(img_gt, img_output, img_ema, ksize):
+    """Reference LDL artifact map with explicit clones, unfolded windows and
+    a boolean-masked assignment."""
+
+    residual_ema = flow.sum(flow.abs(img_gt - img_ema), 1, keepdim=True)
+    residual_sr = flow.sum(flow.abs(img_gt - img_output), 1, keepdim=True)
+
+    patch_level_weight = flow.var(
+        residual_sr.clone(), dim=(-1, -2, -3), keepdim=True
+    ) ** (1 / 5)
+    pad = (ksize - 1) // 2
+    residual_pad = F.pad(residual_sr.clone(), pad=[pad, pad, pad, pad], mode="reflect")
+    unfolded_residual = residual_pad.unfold(2, ksize, 1).unfold(3, ksize, 1)
+    pixel_level_weight = flow.var(unfolded_residual, dim=(-1, -2), unbiased=True)
+    overall_weight = patch_level_weight * pixel_level_weight
+
+    overall_weight[residual_sr < residual_ema] = 0
+
+    return overall_weight
+
+
+def test_get_refined_artifact_map():
+    """Test loss util: get_refined_artifact_map"""
+
+    img_gt = flow.rand((2, 3, 16, 16), dtype=flow.float32)
+    img_output = flow.rand((2, 3, 16, 16), dtype=flow.float32)
+    img_ema = flow.rand((2, 3, 16, 16), dtype=flow.float32)
+
+    out = get_refined_artifact_map(img_gt, img_output, img_ema, 7)
+    assert out.shape == (2, 1, 16, 16)
+    expected = _refined_artifact_map_ref(img_gt, img_output, img_ema, 7)
+    assert flow.allclose(out, expected, atol=1e-5)